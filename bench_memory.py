@@ -0,0 +1,105 @@
+"""
+Measure peak RSS of report rendering as the study guide grows.
+
+Compares the in-memory generate_html_report with the spooled, section-by-section
+generate_html_report_streaming. Each measurement runs in a fresh subprocess,
+since ru_maxrss is a process-wide high-water mark.
+
+The in-memory path gets much slower as the guide grows (convert_markdown_to_html
+restores every placeholder with a full-document replace), so the default sizes
+stay small and each run is capped at RUN_TIMEOUT seconds.
+
+Usage: python bench_memory.py [size_mb ...]
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+RUN_TIMEOUT = 300
+
+SECTION = """## Concept {n}
+
+### The One-Liner (Memorize This)
+- Concept {n} is a *memorable* idea with **bold** claims and $x_{n} = y^2$ math.
+
+### Visual Memory Aid
+```mermaid
+flowchart LR
+    A[Input] --> B[Process_{n}]
+    B --> C[Output]
+```
+
+### Code Example with Narration
+```python
+def concept_{n}(items):
+    return [i * 2 for i in items if i < {n}]
+```
+
+| Case | Result |
+|------|--------|
+| a    | {n}    |
+
+- [x] **Explain to a 10-year-old**: a simple explanation.
+- [ ] Draw the key diagram from memory.
+
+"""
+
+def write_guide(path, size_bytes):
+    """Writes a synthetic study guide of roughly size_bytes to path."""
+    written = 0
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < size_bytes:
+            block = SECTION.format(n=n)
+            f.write(block)
+            written += len(block)
+            n += 1
+
+def run_once(mode, guide_path, out_dir):
+    """Renders one report and prints peak RSS in MB (runs in the child)."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from src.utils import generate_html_report, generate_html_report_streaming
+
+    plan = {"content": "## Plan\n1. Concept: description\n"}
+    qa = {"content": "## Q&A\n**Q1:** What?\n\nAnswer.\n"}
+    tokens = {"prompt_tokens": 0, "candidates_tokens": 0, "total_tokens": 0, "total_cost": 0.0}
+
+    if mode == "streaming":
+        material = {"content_path": guide_path}
+        generate_html_report_streaming("bench", plan, material, qa, tokens, output_dir=out_dir)
+    else:
+        with open(guide_path, "r", encoding="utf-8") as f:
+            material = {"content": f.read()}
+        generate_html_report("bench", plan, material, qa, tokens, output_dir=out_dir)
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{peak_kb / 1024:.1f}")
+
+def main():
+    sizes_mb = [float(a) for a in sys.argv[1:]] or [0.1, 0.25, 0.5]
+
+    print(f"{'guide MB':>9} | {'in-memory MB':>13} | {'streaming MB':>13}")
+    print("-" * 42)
+    with tempfile.TemporaryDirectory() as tmp:
+        guide_path = os.path.join(tmp, "guide.md")
+        for size in sizes_mb:
+            write_guide(guide_path, int(size * 1024 * 1024))
+            peaks = []
+            for mode in ("in-memory", "streaming"):
+                try:
+                    result = subprocess.run(
+                        [sys.executable, __file__, "--run", mode, guide_path, tmp],
+                        capture_output=True, text=True, check=True, timeout=RUN_TIMEOUT
+                    )
+                    peaks.append(result.stdout.strip().splitlines()[-1])
+                except subprocess.TimeoutExpired:
+                    peaks.append("timeout")
+            print(f"{size:>9g} | {peaks[0]:>13} | {peaks[1]:>13}")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--run":
+        run_once(sys.argv[2], sys.argv[3], sys.argv[4])
+    else:
+        main()
@@ -1,10 +1,17 @@
+import json
 import os
+import re
+import tempfile
+import time
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Number of interview questions requested per topic (single and packed mode)
+QA_QUESTION_COUNT = 20
+
 class Agent:
     def __init__(self, model_name="gemini-2.5-flash", tools=None):
         api_key = os.getenv("GOOGLE_API_KEY")
@@ -17,19 +24,31 @@ class Agent:
         self.model_name = model_name
         self.tools = tools
 
-    def generate(self, prompt, use_tools=False):
+    def generate(self, prompt, use_tools=False, spool=False):
+        """
+        Generates a response for the prompt, streaming it from the API.
+
+        With spool=True the streamed text is written to a temporary file as it
+        arrives instead of being accumulated in memory. The result then carries
+        a "content_path" key in place of "content"; the caller owns the file
+        (see utils.release_content).
+
+        When the request fails (missing key, API error, retries exhausted) the
+        result has "error": True and the error message as its content.
+        """
         if not self.client:
              return {
                 "content": "Error: API Key is missing or invalid.",
-                "usage": {"total_tokens": 0}
+                "usage": {"total_tokens": 0},
+                "error": True
             }
 
-        import time
         import sys
         max_retries = 3
         base_delay = 15  # Increased to 15 seconds for rate limit handling
 
         for attempt in range(max_retries):
+            spool_file = None
             try:
                 config = types.GenerateContentConfig(
                     tools=self.tools if use_tools else None
@@ -44,8 +63,14 @@ class Agent:
                     config=config
                 )
                 
-                # Collect streamed content
+                # Collect streamed content (in memory, or spooled to disk)
                 text_content = ""
+                has_text = False
+                if spool:
+                    spool_file = tempfile.NamedTemporaryFile(
+                        mode="w", encoding="utf-8", suffix=".md",
+                        prefix="gemini_spool_", delete=False
+                    )
                 usage = {
                     "prompt_tokens": 0,
                     "candidates_tokens": 0,
@@ -66,7 +91,11 @@ class Agent:
                     
                     # Collect text from each chunk
                     if chunk.text:
-                        text_content += chunk.text
+                        has_text = True
+                        if spool_file:
+                            spool_file.write(chunk.text)
+                        else:
+                            text_content += chunk.text
                     
                     # Get usage from the final chunk (it accumulates)
                     if chunk.usage_metadata:
@@ -80,6 +109,9 @@ class Agent:
                         if hasattr(candidate, 'grounding_metadata') and candidate.grounding_metadata:
                             grounding_used = True
                 
+                if spool_file:
+                    spool_file.close()
+
                 print(f" Done! ({chunk_count} chunks received)")
                 
                 # Log grounding info after streaming completes
@@ -89,14 +121,26 @@ class Agent:
                 if use_tools and not grounding_used:
                     print("  Warning: Grounding was requested but no grounding metadata returned.")
                 
+                if spool_file and has_text:
+                    return {
+                        "content_path": spool_file.name,
+                        "usage": usage,
+                        "grounded": grounding_used
+                    }
+                if spool_file:
+                    os.remove(spool_file.name)
+
                 return {
-                    "content": text_content if text_content else "Error: No text content generated.",
+                    "content": text_content if has_text else "Error: No text content generated.",
                     "usage": usage,
                     "grounded": grounding_used
                 }
 
             except Exception as e:
                 print("")  # New line after progress dots
+                if spool_file:
+                    spool_file.close()
+                    os.remove(spool_file.name)
                 if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
                     if attempt < max_retries - 1:
                         sleep_time = base_delay * (2 ** attempt)
@@ -107,11 +151,13 @@ class Agent:
                 print(f"Error in Agent generation: {e}")
                 return {
                     "content": f"<p class='error'>Error generating content: {str(e)}</p>",
-                    "usage": {"total_tokens": 0}
+                    "usage": {"total_tokens": 0},
+                    "error": True
                 }
         return {
             "content": "<p class='error'>Error: max retries exceeded.</p>",
-            "usage": {"total_tokens": 0}
+            "usage": {"total_tokens": 0},
+            "error": True
         }
 
 class StudyPlanAgent(Agent):
@@ -159,7 +205,7 @@ Provide the output in Markdown format.
         return self.generate(prompt, use_tools=True)
 
 class StudyMaterialAgent(Agent):
-    def create_material(self, topic, plan_data):
+    def create_material(self, topic, plan_data, spool=False):
         print(f"Generating comprehensive study material for: {topic}...")
         plan_content = plan_data['content']
         prompt = f"""
@@ -293,15 +339,23 @@ CRITICAL REQUIREMENTS:
 
 Provide the output in Markdown format.
 """
-        return self.generate(prompt)
+        return self.generate(prompt, spool=spool)
 
 class InterviewPrepAgent(Agent):
-    def create_qa(self, topic, plan_data):
+    # Packed mode: several topics' Q&A in one request, delimited per topic.
+    PACK_START = "<<<QA TOPIC {index} START>>>"
+    PACK_END = "<<<QA TOPIC {index} END>>>"
+    # Question lines, e.g. "**Q3: ...", "### Q3. ...", "Question 3) ..."
+    QUESTION_MARKER = re.compile(r'\s*(#{1,6}\s*)?(\*\*)?(Q|Question\s*)\d+\s*[:.)]', re.IGNORECASE)
+    # Pause between single-topic fallback requests, as main.py does between phases
+    FALLBACK_DELAY = 5
+
+    def create_qa(self, topic, plan_data, spool=False):
         print(f"Generating interview Q&A for: {topic}...")
         plan_content = plan_data['content']
         prompt = f"""
         Act as a senior technical interviewer.
-        Based on the topic '{topic}' and the following study plan, create a list of 20 challenging and important interview questions and answers.
+        Based on the topic '{topic}' and the following study plan, create a list of {QA_QUESTION_COUNT} challenging and important interview questions and answers.
         
         Study Plan Context:
         {plan_content}
@@ -313,4 +367,217 @@ class InterviewPrepAgent(Agent):
         
         Provide the output in Markdown format.
         """
-        return self.generate(prompt)
+        return self.generate(prompt, spool=spool)
+
+    def build_packed_prompt(self, items):
+        """Builds one prompt asking for Q&A on every (topic, plan_data) item."""
+        topic_sections = ""
+        for index, (topic, plan_data) in enumerate(items, start=1):
+            topic_sections += f"""
+        ### Topic {index}: '{topic}'
+        Study Plan Context:
+        {plan_data['content']}
+        """
+
+        return f"""
+        Act as a senior technical interviewer.
+        For EACH of the {len(items)} topics below, create a list of {QA_QUESTION_COUNT} challenging and important interview questions and answers, based on the topic and its study plan.
+        {topic_sections}
+        For every topic, include:
+        1. Concept-based questions relevant to the plan.
+        2. Scenario/Problem-solving questions.
+        3. "Gotcha" questions or common pitfalls.
+
+        OUTPUT FORMAT (follow exactly):
+        - Write each topic's Q&A in Markdown between its own delimiter lines, in order.
+        - The delimiter lines must appear alone on their line, exactly as shown, e.g. for topic 1:
+        {self.PACK_START.format(index=1)}
+        ...Markdown Q&A for topic 1...
+        {self.PACK_END.format(index=1)}
+        - Start every question on its own line as **Q1: ...**, **Q2: ...** and so on, up to **Q{QA_QUESTION_COUNT}: ...**.
+        - Do not write anything outside the delimiters.
+        """
+
+    def count_questions(self, content):
+        """Counts question marker lines (see QUESTION_MARKER) in Q&A Markdown."""
+        return sum(1 for line in content.splitlines() if self.QUESTION_MARKER.match(line))
+
+    def split_packed_response(self, text, count):
+        """
+        Splits a packed response into per-topic Markdown.
+
+        Returns a list of length count; entries that are missing or have
+        fewer than QA_QUESTION_COUNT questions are None.
+        """
+        contents = []
+        for index in range(1, count + 1):
+            pattern = re.escape(self.PACK_START.format(index=index)) + r'(.*?)' + re.escape(self.PACK_END.format(index=index))
+            match = re.search(pattern, text, flags=re.DOTALL)
+            content = match.group(1).strip() if match else ""
+            if self.count_questions(content) < QA_QUESTION_COUNT:
+                contents.append(None)
+            else:
+                contents.append(content)
+        return contents
+
+    def _split_usage(self, usage, count):
+        """Divides one request's token usage evenly across count results."""
+        shares = [{} for _ in range(count)]
+        for key, value in usage.items():
+            base, remainder = divmod(value, count)
+            for i in range(count):
+                shares[i][key] = base + (1 if i < remainder else 0)
+        return shares
+
+    def _error_results(self, count, message, usage):
+        """Builds count error results, charging the whole usage to the first."""
+        zero = {key: 0 for key in usage} or {"total_tokens": 0}
+        return [
+            {"content": message, "usage": dict(usage) if i == 0 else dict(zero), "error": True}
+            for i in range(count)
+        ]
+
+    def _pack_ranges(self, count, pack_size):
+        """Maps each pack's batch key to its (start, end) slice of the items."""
+        return {
+            f"qa-pack-{start}-{min(start + pack_size, count)}": (start, min(start + pack_size, count))
+            for start in range(0, count, pack_size)
+        }
+
+    def _unpack(self, items, text, usage, grounded=False):
+        """
+        Turns one packed response into per-topic results.
+
+        Topics that fail to parse get an error result marked "parse_failed".
+        The request's usage is split across the parsed topics, or charged to
+        the first failed topic when none parsed, so no tokens are dropped.
+        """
+        contents = self.split_packed_response(text, len(items))
+        parsed_count = sum(1 for c in contents if c is not None)
+        shares = self._split_usage(usage, parsed_count) if parsed_count else []
+        unclaimed = dict(usage) if not parsed_count else {}
+        results = []
+        for (topic, _), content in zip(items, contents):
+            if content is None:
+                results.append({
+                    "content": f"<p class='error'>Error: packed Q&A output for '{topic}' failed to parse.</p>",
+                    "usage": unclaimed or {"total_tokens": 0},
+                    "error": True,
+                    "parse_failed": True
+                })
+                unclaimed = {}
+            else:
+                results.append({
+                    "content": content,
+                    "usage": shares.pop(0),
+                    "grounded": grounded
+                })
+        return results
+
+    def _fill_fallbacks(self, items, results):
+        """
+        Retries every topic that failed to parse with a single-topic request.
+
+        Requests are spaced by FALLBACK_DELAY seconds, and usage already
+        charged to the failed result is added to the retry's.
+        """
+        for i, result in enumerate(results):
+            if result.get("parse_failed"):
+                topic, plan_data = items[i]
+                print(f"  Packed output for '{topic}' failed to parse, falling back to a single request...")
+                time.sleep(self.FALLBACK_DELAY)
+                retry = self.create_qa(topic, plan_data)
+                usage = dict(retry.get("usage") or {})
+                for key, value in result["usage"].items():
+                    usage[key] = usage.get(key, 0) + value
+                retry["usage"] = usage
+                results[i] = retry
+        return results
+
+    def create_qa_packed(self, items, pack_size=5):
+        """
+        Generates interview Q&A for several topics, pack_size topics per request.
+
+        items is a list of (topic, plan_data) pairs; returns one result per
+        item, in order, shaped like create_qa's. Topics whose output fails to
+        parse are retried one by one; if the packed request itself fails (an
+        error result from generate), the whole pack gets that error instead.
+        """
+        results = []
+        for start, end in self._pack_ranges(len(items), pack_size).values():
+            pack = items[start:end]
+            topics = ", ".join(topic for topic, _ in pack)
+            print(f"Generating packed interview Q&A for: {topics}...")
+            response = self.generate(self.build_packed_prompt(pack))
+            if response.get("error"):
+                results.extend(self._error_results(len(pack), response["content"], response["usage"]))
+                continue
+            pack_results = self._unpack(pack, response["content"], response["usage"], response.get("grounded", False))
+            results.extend(self._fill_fallbacks(pack, pack_results))
+        return results
+
+    def export_qa_batch(self, items, path, pack_size=5):
+        """
+        Writes packed Q&A requests as batch-style JSONL instead of calling the API.
+
+        Each line is {"key": ..., "request": GenerateContentRequest}, the inline
+        request format used by Gemini batch jobs. Returns the number of requests.
+        """
+        ranges = self._pack_ranges(len(items), pack_size)
+        with open(path, "w", encoding="utf-8") as f:
+            for key, (start, end) in ranges.items():
+                line = {
+                    "key": key,
+                    "request": {
+                        "contents": [{"role": "user", "parts": [{"text": self.build_packed_prompt(items[start:end])}]}]
+                    }
+                }
+                f.write(json.dumps(line) + "\n")
+        return len(ranges)
+
+    def import_qa_batch(self, items, path, pack_size=5, fallback=True):
+        """
+        Reads batch-style JSONL responses for requests from export_qa_batch.
+
+        items and pack_size must match the export. Each line is
+        {"key": ..., "response": GenerateContentResponse} or
+        {"key": ..., "error": ...}; lines with keys that are not part of the
+        export are reported and skipped. Topics whose packed output fails to
+        parse are retried with single-topic requests when fallback is set,
+        and kept as error results otherwise. Packs with an error line or no
+        line at all get error results without retries, like a failed packed
+        request.
+        """
+        ranges = self._pack_ranges(len(items), pack_size)
+        results = self._error_results(
+            len(items), "<p class='error'>Error: no batch response for this topic.</p>", {"total_tokens": 0}
+        )
+        with open(path, "r", encoding="utf-8") as f:
+            for raw in f:
+                if not raw.strip():
+                    continue
+                line = json.loads(raw)
+                key = line.get("key", "")
+                if key not in ranges:
+                    print(f"  Skipping batch response with unknown key: {key!r}")
+                    continue
+                start, end = ranges[key]
+                if line.get("error") or not line.get("response"):
+                    message = f"<p class='error'>Error generating content: {line.get('error')}</p>"
+                    results[start:end] = self._error_results(end - start, message, {"total_tokens": 0})
+                    continue
+                response = line["response"]
+                candidates = response.get("candidates") or [{}]
+                parts = (candidates[0].get("content") or {}).get("parts") or []
+                text = "".join(part.get("text", "") for part in parts)
+                metadata = response.get("usageMetadata") or {}
+                usage = {
+                    "prompt_tokens": metadata.get("promptTokenCount", 0),
+                    "candidates_tokens": metadata.get("candidatesTokenCount", 0),
+                    "total_tokens": metadata.get("totalTokenCount", 0)
+                }
+                results[start:end] = self._unpack(items[start:end], text, usage)
+
+        if fallback:
+            self._fill_fallbacks(items, results)
+        return results
@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 import time
@@ -8,9 +9,38 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 from src.agents import StudyPlanAgent, StudyMaterialAgent, InterviewPrepAgent
-from src.utils import generate_html_report
+from src.utils import ReportRenderer, generate_html_report, generate_html_report_streaming, release_content, save_guide_sources
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Multi-Agent Study System")
+    parser.add_argument(
+        "--low-memory",
+        action="store_true",
+        help="Spool large generations to temporary files and render the report "
+             "section by section, keeping peak memory flat for very large guides."
+    )
+    parser.add_argument(
+        "--rerender-all",
+        action="store_true",
+        help="Re-render every stored guide in output/sources with the current "
+             "template, using all CPU cores, then exit."
+    )
+    return parser.parse_args()
+
+def rerender_all():
+    print("Re-rendering all stored guides...", flush=True)
+    start = time.time()
+    with ReportRenderer() as renderer:
+        results = renderer.rerender_all()
+    failed = sum(1 for result in results if "error" in result)
+    print(f"Re-rendered {len(results) - failed} guides ({failed} failed) in {time.time() - start:.1f}s using {renderer.max_workers} workers.")
 
 def main():
+    args = parse_args()
+    if args.rerender_all:
+        rerender_all()
+        return
+
     print("Welcome to the Multi-Agent Study System!")
     topic = input("Enter the topic you want to master: ").strip()
     
@@ -18,6 +48,10 @@ def main():
         print("Topic cannot be empty.")
         return
 
+    # Spooled results (--low-memory) own temp files; released in the finally below
+    study_material_data = {}
+    interview_qa_data = {}
+
     try:
         # Initialize Agents
         print("\nInitializing Agents...")
@@ -50,7 +84,7 @@ def main():
         
         # Step 2: Content Generation
         print("\n--- Phase 2: Generating Comprehensive Study Material ---", flush=True)
-        study_material_data = material_agent.create_material(topic, study_plan_data)
+        study_material_data = material_agent.create_material(topic, study_plan_data, spool=args.low_memory)
         update_tokens(study_material_data.get("usage"))
         
         # Small delay to avoid rate limits
@@ -58,7 +92,7 @@ def main():
         
         # Step 3: Interview Prep
         print("\n--- Phase 3: Preparing Interview Questions ---", flush=True)
-        interview_qa_data = interview_agent.create_qa(topic, study_plan_data)
+        interview_qa_data = interview_agent.create_qa(topic, study_plan_data, spool=args.low_memory)
         update_tokens(interview_qa_data.get("usage"))
 
         # Calculate cost
@@ -73,7 +107,16 @@ def main():
 
         # Step 4: Final Report
         print("\n--- Phase 4: Compiling Final Report ---", flush=True)
-        output_path = generate_html_report(topic, study_plan_data, study_material_data, interview_qa_data, total_tokens)
+        if args.low_memory:
+            output_path = generate_html_report_streaming(topic, study_plan_data, study_material_data, interview_qa_data, total_tokens)
+        else:
+            output_path = generate_html_report(topic, study_plan_data, study_material_data, interview_qa_data, total_tokens)
+
+        # Keep the sources for --rerender-all; the report is already written
+        try:
+            save_guide_sources(topic, study_plan_data, study_material_data, interview_qa_data, total_tokens)
+        except Exception as e:
+            print(f"Warning: could not save guide sources for re-rendering: {e}")
         
         print(f"\nSuccess! Your study guide is ready at: {output_path}")
         print(f"Absolute path: {os.path.abspath(output_path)}")
@@ -90,6 +133,10 @@ def main():
         print(f"\nAn error occurred: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        # Always remove spool files, even on errors or Ctrl-C
+        release_content(study_material_data)
+        release_content(interview_qa_data)
 
 if __name__ == "__main__":
     main()
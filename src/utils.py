@@ -1,7 +1,14 @@
+import io
+import json
 import os
 import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import markdown
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+GUIDE_SECTIONS = ("study_plan", "study_material", "interview_qa")
 
 def save_to_file(content, filename, directory="output"):
     """Saves content to a file in the specified directory."""
@@ -123,10 +130,35 @@ def convert_markdown_to_html(text):
     
     return html
 
+def guide_slug(topic):
+    """Returns the file name stem used for a topic's report and sources."""
+    return f"{topic.replace(' ', '_').lower()}_study_guide"
+
+@lru_cache(maxsize=None)
+def load_report_environment(template_dir="templates"):
+    """
+    Returns the Jinja2 environment for template_dir, created once per process.
+
+    Compiled bytecode is also cached on disk, so fresh processes (e.g. pool
+    workers) skip recompiling an unchanged template.
+    """
+    return Environment(
+        loader=FileSystemLoader(template_dir),
+        bytecode_cache=FileSystemBytecodeCache()
+    )
+
+def load_report_template(template_dir="templates"):
+    """
+    Returns the compiled report template.
+
+    The environment keeps compiled templates and, with auto_reload, recompiles
+    one only when its file has changed, so call this on every render.
+    """
+    return load_report_environment(template_dir).get_template("report_template.html")
+
 def generate_html_report(topic, study_plan_data, study_material_data, interview_qa_data, total_tokens, template_dir="templates", output_dir="output"):
     """Generates an HTML report using Jinja2."""
-    env = Environment(loader=FileSystemLoader(template_dir))
-    template = env.get_template("report_template.html")
+    template = load_report_template(template_dir)
     
     # Convert content to HTML
     study_plan_html = convert_markdown_to_html(study_plan_data['content'])
@@ -141,9 +173,278 @@ def generate_html_report(topic, study_plan_data, study_material_data, interview_
         token_usage=total_tokens
     )
     
-    filename = f"{topic.replace(' ', '_').lower()}_study_guide.html"
+    filename = f"{guide_slug(topic)}.html"
     return save_to_file(html_content, filename, output_dir)
 
+LIST_ITEM_PATTERN = re.compile(r'\s*([-*+]|\d+[.)])\s')
+LINK_DEFINITION_PATTERN = re.compile(r' {0,3}\[([^\]]+)\]:\s*\S')
+HTML_BLOCK_PATTERN = re.compile(r'<([a-zA-Z][a-zA-Z0-9-]*)')
+VOID_HTML_TAGS = {'br', 'hr', 'img', 'input', 'meta', 'link', 'wbr'}
+
+def iter_markdown_sections(lines, max_chunk_chars=64_000):
+    """
+    Groups Markdown lines into independently convertible chunks.
+
+    A chunk ends before every '#'/'##' heading. Once it grows past
+    max_chunk_chars it also ends at the next paragraph break where the new
+    block is unindented and not a list item, and the previous block was not a
+    list or a '>' quote (either could continue across the blank line).
+    Nothing splits inside fenced code, $$ display math or a raw HTML block.
+
+    Fences are tracked the way convert_markdown_to_html pairs them: every
+    ``` opens or closes one, so a line such as "```a``` b" opens nothing.
+    """
+    chunk = []
+    chunk_chars = 0
+    in_fence = False
+    in_math = False
+    html_tag = None
+    html_depth = 0
+    previous_blank = False
+    last_block_joins_next = False
+
+    for line in lines:
+        stripped = line.lstrip()
+        is_blank = not stripped
+        is_indented = line[:1] in (' ', '\t')
+        is_list_item = LIST_ITEM_PATTERN.match(line) is not None
+        is_block_start = not is_blank and not is_indented and (previous_blank or not chunk)
+
+        if not in_fence and not in_math and not html_tag and chunk:
+            is_heading = re.match(r'#{1,2} ', line) is not None
+            is_oversized_break = (
+                chunk_chars > max_chunk_chars and is_block_start
+                and not is_list_item and not last_block_joins_next
+            )
+            if is_heading or is_oversized_break:
+                yield ''.join(chunk)
+                chunk = []
+                chunk_chars = 0
+
+        if line.count('```') % 2:
+            in_fence = not in_fence
+        elif not in_fence and line.count('$$') % 2:
+            in_math = not in_math
+
+        if not in_fence and not in_math:
+            html_match = HTML_BLOCK_PATTERN.match(line) if is_block_start and not html_tag else None
+            if html_match and html_match.group(1).lower() not in VOID_HTML_TAGS:
+                html_tag = html_match.group(1).lower()
+                html_depth = 0
+            if html_tag:
+                lowered = line.lower()
+                html_depth += len(re.findall(rf'<{html_tag}\b', lowered))
+                html_depth -= lowered.count(f'</{html_tag}>')
+                if html_depth <= 0:
+                    html_tag = None
+
+        # Remember whether the block could carry on past a blank line, so a
+        # split never lands between list items or quoted paragraphs.
+        if is_block_start:
+            last_block_joins_next = is_list_item or stripped.startswith('>')
+
+        chunk.append(line)
+        chunk_chars += len(line)
+        previous_blank = is_blank
+
+    if chunk:
+        yield ''.join(chunk)
+
+def collect_link_definitions(lines):
+    """
+    Collects reference-style link definitions ("[label]: url ...").
+
+    Returns a dict mapping each lower-cased label to its definition line, so
+    definitions can be carried into every chunk that uses them.
+    """
+    definitions = {}
+    in_fence = False
+    for line in lines:
+        if line.lstrip().startswith('```'):
+            in_fence = not in_fence
+            continue
+        match = None if in_fence else LINK_DEFINITION_PATTERN.match(line)
+        if match:
+            definitions[match.group(1).lower()] = line.rstrip('\n')
+    return definitions
+
+def _with_link_definitions(chunk, definitions):
+    """Appends the link definitions a chunk refers to but may not contain."""
+    if not definitions:
+        return chunk
+    lowered = chunk.lower()
+    used = [line for label, line in definitions.items() if f'[{label}]' in lowered]
+    if not used:
+        return chunk
+    return chunk.rstrip('\n') + '\n\n' + '\n'.join(used) + '\n'
+
+def open_content(data):
+    """
+    Opens an agent result's content for line-by-line reading.
+
+    Works for both in-memory results ("content") and spooled ones
+    ("content_path", see Agent.generate).
+    """
+    if 'content_path' in data:
+        return open(data['content_path'], 'r', encoding='utf-8')
+    return io.StringIO(data['content'])
+
+def release_content(data):
+    """Deletes the spool file behind an agent result, if it has one."""
+    path = data.get('content_path')
+    if path and os.path.exists(path):
+        os.remove(path)
+
+def generate_html_report_streaming(topic, study_plan_data, study_material_data, interview_qa_data, total_tokens, template_dir="templates", output_dir="output", max_chunk_chars=64_000):
+    """
+    Generates the HTML report with bounded memory.
+
+    Each section is read (from memory or its spool file), converted one
+    Markdown chunk at a time (see iter_markdown_sections) and written straight
+    to the output file, so peak memory tracks the largest chunk instead of the
+    whole guide. Reference-style link definitions are carried into the chunks
+    that use them. The HTML matches generate_html_report's except for
+    whitespace between chunks.
+    """
+    template = load_report_template(template_dir)
+
+    # Render the page shell with sentinels where the sections go, then stream
+    # each section's HTML into the gaps.
+    sections = [
+        ('study_plan', study_plan_data),
+        ('study_material', study_material_data),
+        ('interview_qa', interview_qa_data),
+    ]
+    sentinels = {name: f'\x00SECTION:{name}\x00' for name, _ in sections}
+    shell = template.render(topic=topic, token_usage=total_tokens, **sentinels)
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    filepath = os.path.join(output_dir, f"{guide_slug(topic)}.html")
+    tmp_path = filepath + '.part'
+
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            for name, data in sections:
+                before, shell = shell.split(sentinels[name], 1)
+                out.write(before)
+                with open_content(data) as f:
+                    definitions = collect_link_definitions(f)
+                with open_content(data) as f:
+                    for chunk in iter_markdown_sections(f, max_chunk_chars):
+                        out.write(convert_markdown_to_html(_with_link_definitions(chunk, definitions)))
+                        out.write('\n')
+            out.write(shell)
+        os.replace(tmp_path, filepath)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return filepath
+
+def save_guide_sources(topic, study_plan_data, study_material_data, interview_qa_data, total_tokens, sources_dir="output/sources"):
+    """
+    Stores a guide's Markdown sections and token usage so it can be re-rendered.
+
+    Layout: <sources_dir>/<slug>/{meta.json, study_plan.md, study_material.md,
+    interview_qa.md}. Spooled sections are copied file to file.
+    """
+    guide_dir = os.path.join(sources_dir, guide_slug(topic))
+    if not os.path.exists(guide_dir):
+        os.makedirs(guide_dir)
+
+    sections = zip(GUIDE_SECTIONS, (study_plan_data, study_material_data, interview_qa_data))
+    for name, data in sections:
+        path = os.path.join(guide_dir, f"{name}.md")
+        if 'content_path' in data:
+            shutil.copyfile(data['content_path'], path)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data['content'])
+
+    with open(os.path.join(guide_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"topic": topic, "token_usage": total_tokens}, f, indent=2)
+    return guide_dir
+
+def load_guide_sources(guide_dir):
+    """Loads a guide stored by save_guide_sources as (topic, sections, token_usage)."""
+    with open(os.path.join(guide_dir, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    sections = []
+    for name in GUIDE_SECTIONS:
+        with open(os.path.join(guide_dir, f"{name}.md"), "r", encoding="utf-8") as f:
+            sections.append({"content": f.read()})
+    return meta["topic"], sections, meta.get("token_usage")
+
+class ReportRenderer:
+    """
+    Bulk renderer for stored guides.
+
+    Renders one guide per process-pool worker, each reusing its cached
+    template environment (see load_report_environment), so template edits
+    are picked up without recompiling unchanged templates. Use as a context
+    manager so the pool is shut down when done.
+    """
+
+    def __init__(self, template_dir="templates", max_workers=None):
+        self.template_dir = template_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def rerender_all(self, sources_dir="output/sources", output_dir="output"):
+        """
+        Re-renders every guide stored under sources_dir, one guide per worker.
+
+        Returns one result per guide: {"guide": dir, "path": report} on
+        success or {"guide": dir, "error": message} on failure. A guide that
+        fails is reported and skipped; the rest are still rendered.
+        """
+        if not os.path.isdir(sources_dir):
+            print(f"No stored guides found in {sources_dir}.")
+            return []
+
+        guide_dirs = sorted(
+            os.path.join(sources_dir, name) for name in os.listdir(sources_dir)
+            if os.path.isdir(os.path.join(sources_dir, name))
+        )
+        if self.max_workers == 1:
+            results = [_rerender_guide(guide_dir, self.template_dir, output_dir) for guide_dir in guide_dirs]
+        else:
+            pool = self._get_pool()
+            chunksize = max(1, len(guide_dirs) // (self.max_workers * 4))
+            args = ([self.template_dir] * len(guide_dirs), [output_dir] * len(guide_dirs))
+            results = list(pool.map(_rerender_guide, guide_dirs, *args, chunksize=chunksize))
+
+        for result in results:
+            if "error" in result:
+                print(f"  Failed to re-render {result['guide']}: {result['error']}")
+        return results
+
+def _rerender_guide(guide_dir, template_dir, output_dir):
+    """Pool worker: renders one stored guide, converting its sections serially."""
+    try:
+        topic, sections, token_usage = load_guide_sources(guide_dir)
+        path = generate_html_report(topic, *sections, token_usage, template_dir=template_dir, output_dir=output_dir)
+        return {"guide": guide_dir, "path": path}
+    except Exception as e:
+        return {"guide": guide_dir, "error": f"{type(e).__name__}: {e}"}
+
 def clean_text(text):
     """Basic text cleaning if needed."""
     return text.strip()
@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# Ensure the repository root is in python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import pytest
+
+from src.agents import Agent
+
+def _chunk(text, total_tokens=0):
+    usage = SimpleNamespace(
+        prompt_token_count=1,
+        candidates_token_count=total_tokens - 1,
+        total_token_count=total_tokens
+    ) if total_tokens else None
+    return SimpleNamespace(text=text, usage_metadata=usage, candidates=None)
+
+class FakeModels:
+    """Stands in for client.models; each call plays the next scripted stream."""
+
+    def __init__(self, streams):
+        self.streams = list(streams)
+
+    def generate_content_stream(self, model, contents, config):
+        return self.streams.pop(0)()
+
+def _agent(streams):
+    agent = Agent()
+    agent.client = SimpleNamespace(models=FakeModels(streams))
+    return agent
+
+def _spool_files(directory):
+    return [name for name in os.listdir(directory) if name.startswith("gemini_spool_")]
+
+@pytest.fixture(autouse=True)
+def spool_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    return tmp_path
+
+def test_spool_returns_content_path(spool_dir):
+    agent = _agent([lambda: iter([_chunk("# Title\n"), _chunk("Body text.\n", total_tokens=12)])])
+    result = agent.generate("prompt", spool=True)
+
+    assert "content" not in result
+    assert result["usage"]["total_tokens"] == 12
+    with open(result["content_path"], encoding="utf-8") as f:
+        assert f.read() == "# Title\nBody text.\n"
+    assert _spool_files(spool_dir) == [os.path.basename(result["content_path"])]
+
+def test_spool_file_removed_when_no_text(spool_dir):
+    agent = _agent([lambda: iter([_chunk(None, total_tokens=3)])])
+    result = agent.generate("prompt", spool=True)
+
+    assert result["content"] == "Error: No text content generated."
+    assert _spool_files(spool_dir) == []
+
+def test_spool_file_removed_on_exception(spool_dir):
+    def broken_stream():
+        yield _chunk("partial ")
+        raise RuntimeError("connection reset")
+
+    agent = _agent([broken_stream])
+    result = agent.generate("prompt", spool=True)
+
+    assert "connection reset" in result["content"]
+    assert _spool_files(spool_dir) == []
+
+def test_spool_retry_after_rate_limit_leaves_one_file(spool_dir):
+    def rate_limited_stream():
+        yield _chunk("partial ")
+        raise RuntimeError("429 RESOURCE_EXHAUSTED")
+
+    agent = _agent([rate_limited_stream, lambda: iter([_chunk("full answer", total_tokens=5)])])
+    result = agent.generate("prompt", spool=True)
+
+    with open(result["content_path"], encoding="utf-8") as f:
+        assert f.read() == "full answer"
+    assert _spool_files(spool_dir) == [os.path.basename(result["content_path"])]
@@ -0,0 +1,109 @@
+import json
+import os
+import sys
+import time
+
+# Ensure the repository root is in python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import pytest
+
+from src.agents import QA_QUESTION_COUNT, InterviewPrepAgent
+
+ITEMS = [("Topic A", {"content": "plan a"}), ("Topic B", {"content": "plan b"}), ("Topic C", {"content": "plan c"})]
+
+def _qa(count):
+    return "\n".join(f"**Q{i}: Why does case {i} matter?**\nBecause of reason {i}." for i in range(1, count + 1))
+
+def _packed(agent, bodies):
+    return "".join(
+        f"{agent.PACK_START.format(index=i)}\n{body}\n{agent.PACK_END.format(index=i)}\n"
+        for i, body in enumerate(bodies, start=1)
+    )
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    agent = InterviewPrepAgent()
+    agent.prompts = []
+
+    def stub_generate(responses):
+        def generate(prompt, use_tools=False, spool=False):
+            agent.prompts.append(prompt)
+            return responses.pop(0)
+        agent.generate = generate
+
+    agent.stub_generate = stub_generate
+    return agent
+
+def test_short_topic_falls_back_once_and_keeps_tokens(agent):
+    packed = _packed(agent, [_qa(QA_QUESTION_COUNT), _qa(QA_QUESTION_COUNT - 5), _qa(QA_QUESTION_COUNT)])
+    agent.stub_generate([
+        {"content": packed, "usage": {"total_tokens": 17}, "grounded": False},
+        {"content": _qa(QA_QUESTION_COUNT), "usage": {"total_tokens": 2}, "grounded": False},
+    ])
+
+    results = agent.create_qa_packed(ITEMS)
+
+    assert len(agent.prompts) == 2
+    assert "'Topic B'" in agent.prompts[1]
+    assert [r["usage"]["total_tokens"] for r in results] == [9, 2, 8]
+    assert not any(r.get("error") for r in results)
+
+def test_unparsed_pack_charges_whole_usage(agent):
+    packed = _packed(agent, ["no questions here"] * 3)
+    single = {"content": _qa(QA_QUESTION_COUNT), "usage": {"total_tokens": 2}, "grounded": False}
+    agent.stub_generate([
+        {"content": packed, "usage": {"total_tokens": 17}, "grounded": False},
+        dict(single), dict(single), dict(single),
+    ])
+
+    results = agent.create_qa_packed(ITEMS)
+
+    assert len(agent.prompts) == 4
+    assert sum(r["usage"]["total_tokens"] for r in results) == 17 + 3 * 2
+
+def test_failed_packed_request_is_not_retried(agent):
+    agent.stub_generate([
+        {"content": "<p class='error'>Error: max retries exceeded.</p>", "usage": {"total_tokens": 0}, "error": True},
+    ])
+
+    results = agent.create_qa_packed(ITEMS)
+
+    assert len(agent.prompts) == 1
+    assert len(results) == len(ITEMS)
+    assert all(r["error"] and "max retries exceeded" in r["content"] for r in results)
+
+def test_batch_round_trip_with_error_line(agent, tmp_path):
+    requests_path = tmp_path / "requests.jsonl"
+    responses_path = tmp_path / "responses.jsonl"
+    assert agent.export_qa_batch(ITEMS, str(requests_path), pack_size=2) == 2
+
+    with open(requests_path, encoding="utf-8") as f:
+        requests = [json.loads(line) for line in f]
+    good, bad = requests
+    prompt = good["request"]["contents"][0]["parts"][0]["text"]
+    assert "'Topic A'" in prompt and "'Topic B'" in prompt
+
+    with open(responses_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "key": good["key"],
+            "response": {
+                "candidates": [{"content": {"parts": [{"text": _packed(agent, [_qa(QA_QUESTION_COUNT)] * 2)}]}}],
+                "usageMetadata": {"promptTokenCount": 7, "candidatesTokenCount": 3, "totalTokenCount": 10}
+            }
+        }) + "\n")
+        f.write(json.dumps({"key": bad["key"], "error": {"code": 500, "message": "internal"}}) + "\n")
+        f.write(json.dumps({"key": "qa-pack-0-5", "error": "out of range"}) + "\n")
+
+    agent.stub_generate([])
+    results = agent.import_qa_batch(ITEMS, str(responses_path), pack_size=2)
+
+    assert agent.prompts == []
+    assert len(results) == len(ITEMS)
+    assert [r["usage"]["total_tokens"] for r in results[:2]] == [5, 5]
+    assert results[0]["content"].startswith("**Q1:")
+    assert results[2]["error"] and "internal" in results[2]["content"]
@@ -0,0 +1,83 @@
+import os
+import shutil
+import sys
+
+# Ensure the repository root is in python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.utils import (
+    ReportRenderer, generate_html_report, guide_slug, load_guide_sources,
+    load_report_environment, load_report_template, save_guide_sources,
+)
+
+TEMPLATE_DIR = os.path.join(parent_dir, "templates")
+TOKENS = {"prompt_tokens": 1, "candidates_tokens": 2, "total_tokens": 3, "total_cost": 0.0}
+
+def _sections(name):
+    return (
+        {"content": f"## Plan for {name}\n1. Concept"},
+        {"content": f"# Material for {name}\n\n- point"},
+        {"content": f"**Q1: What is {name}?**\n\nAnswer."},
+    )
+
+def test_save_and_load_round_trip_with_spooled_section(tmp_path):
+    spool_path = tmp_path / "gemini_spool_material.md"
+    spool_path.write_text("# Spooled material\n\nBody.\n", encoding="utf-8")
+    plan, _, qa = _sections("spool")
+
+    guide_dir = save_guide_sources(
+        "Spooled Topic", plan, {"content_path": str(spool_path)}, qa, TOKENS,
+        sources_dir=str(tmp_path / "sources")
+    )
+
+    assert os.path.basename(guide_dir) == guide_slug("Spooled Topic")
+    topic, sections, token_usage = load_guide_sources(guide_dir)
+    assert topic == "Spooled Topic"
+    assert sections == [plan, {"content": "# Spooled material\n\nBody.\n"}, qa]
+    assert token_usage == TOKENS
+    # The spool file is copied, not moved; the caller still releases it
+    assert spool_path.exists()
+
+def test_template_edit_is_picked_up_by_cached_environment(tmp_path):
+    template_dir = tmp_path / "templates"
+    shutil.copytree(TEMPLATE_DIR, template_dir)
+    template_path = template_dir / "report_template.html"
+    plan, material, qa = _sections("reload")
+
+    first = generate_html_report("Reload", plan, material, qa, TOKENS, template_dir=str(template_dir), output_dir=str(tmp_path / "out"))
+    with open(first, encoding="utf-8") as f:
+        assert "EDITED TEMPLATE" not in f.read()
+    environment = load_report_environment(str(template_dir))
+
+    template_path.write_text(template_path.read_text(encoding="utf-8").replace("<title>", "<title>EDITED TEMPLATE "), encoding="utf-8")
+    stat = template_path.stat()
+    os.utime(template_path, (stat.st_atime, stat.st_mtime + 10))
+
+    second = generate_html_report("Reload", plan, material, qa, TOKENS, template_dir=str(template_dir), output_dir=str(tmp_path / "out"))
+    with open(second, encoding="utf-8") as f:
+        assert "EDITED TEMPLATE" in f.read()
+    assert load_report_environment(str(template_dir)) is environment
+    assert load_report_template(str(template_dir)) is load_report_template(str(template_dir))
+
+def test_rerender_all_reports_broken_guide_and_renders_the_rest(tmp_path):
+    sources_dir = tmp_path / "sources"
+    output_dir = tmp_path / "out"
+    for name in ("Alpha", "Beta", "Gamma"):
+        save_guide_sources(name, *_sections(name), TOKENS, sources_dir=str(sources_dir))
+    os.remove(sources_dir / guide_slug("Beta") / "meta.json")
+
+    for max_workers in (1, 2):
+        with ReportRenderer(template_dir=TEMPLATE_DIR, max_workers=max_workers) as renderer:
+            results = renderer.rerender_all(sources_dir=str(sources_dir), output_dir=str(output_dir))
+
+        assert [os.path.basename(r["guide"]) for r in results] == [guide_slug(n) for n in ("Alpha", "Beta", "Gamma")]
+        assert "FileNotFoundError" in results[1]["error"]
+        for result in (results[0], results[2]):
+            with open(result["path"], encoding="utf-8") as f:
+                assert "Material for" in f.read()
+
+def test_rerender_all_without_sources_dir(tmp_path):
+    with ReportRenderer(template_dir=TEMPLATE_DIR, max_workers=1) as renderer:
+        assert renderer.rerender_all(sources_dir=str(tmp_path / "missing"), output_dir=str(tmp_path / "out")) == []
@@ -0,0 +1,127 @@
+import os
+import re
+import sys
+
+# Ensure the repository root is in python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.utils import generate_html_report, generate_html_report_streaming, iter_markdown_sections
+
+TEMPLATE_DIR = os.path.join(parent_dir, "templates")
+TOKENS = {"prompt_tokens": 1, "candidates_tokens": 2, "total_tokens": 3, "total_cost": 0.0}
+
+GUIDE = """# Guide
+
+Intro paragraph with a [ref link][r1] defined much later.
+
+## Lists
+
+1. Item one with a long first paragraph.
+
+    continued paragraph of item one
+
+2. Item two
+
+- [x] **Explain to a 10-year-old**: simple words.
+- [ ] Draw the diagram.
+
+* Star bullet
+* Another star bullet
+
+Plain paragraph after the lists.
+
+## Code
+
+```python
+def f(x):
+
+    # blank line above must stay inside the block
+    return x < 2 and x > 0
+```
+
+```mermaid
+flowchart LR
+    A[Input] --> B[Output]
+```
+
+Inline math $a_1 + b$ and display math:
+
+$$
+x^2 + y^2 = z^2
+$$
+
+| Case | Result |
+|------|--------|
+| a    | 1      |
+
+# Appendix
+
+[r1]: https://example.com/ref "Reference"
+"""
+
+def _normalize(html):
+    return re.sub(r'\s+', '', html)
+
+def _render_both(tmp_path, guide, max_chunk_chars):
+    plan = {"content": "## Plan\n1. Concept: description\n"}
+    qa = {"content": "**Q1: What?**\n\nAnswer.\n"}
+    in_memory = generate_html_report(
+        "guide", plan, {"content": guide}, qa, TOKENS,
+        template_dir=TEMPLATE_DIR, output_dir=str(tmp_path / "memory")
+    )
+    spool_path = tmp_path / "material.md"
+    spool_path.write_text(guide, encoding="utf-8")
+    streaming = generate_html_report_streaming(
+        "guide", plan, {"content_path": str(spool_path)}, qa, TOKENS,
+        template_dir=TEMPLATE_DIR, output_dir=str(tmp_path / "streaming"),
+        max_chunk_chars=max_chunk_chars
+    )
+    with open(in_memory, encoding="utf-8") as f:
+        in_memory_html = f.read()
+    with open(streaming, encoding="utf-8") as f:
+        streaming_html = f.read()
+    return in_memory_html, streaming_html
+
+def test_streaming_matches_in_memory_with_forced_splits(tmp_path):
+    # A tiny chunk limit forces a split attempt at every paragraph break.
+    in_memory_html, streaming_html = _render_both(tmp_path, GUIDE, max_chunk_chars=1)
+    assert _normalize(streaming_html) == _normalize(in_memory_html)
+    assert '<a href="https://example.com/ref"' in streaming_html
+    assert 'start="2"' not in streaming_html
+
+def test_streaming_matches_in_memory_on_large_guide(tmp_path):
+    guide = "".join(GUIDE.replace("# Appendix", f"# Appendix {i}") for i in range(50))
+    in_memory_html, streaming_html = _render_both(tmp_path, guide, max_chunk_chars=2_000)
+    assert _normalize(streaming_html) == _normalize(in_memory_html)
+
+def test_sections_never_split_inside_code_or_lists():
+    chunks = list(iter_markdown_sections(GUIDE.splitlines(keepends=True), max_chunk_chars=1))
+    assert "".join(chunks) == GUIDE
+    for chunk in chunks:
+        assert chunk.count("```") % 2 == 0
+        assert not chunk.startswith("    continued")
+        assert not chunk.startswith("2. Item two")
+
+EDGE_CASES = {
+    "blockquote": "Intro.\n\n> quote one\n\n> quote two\n\nAfter the quote.\n",
+    "raw_html": "Intro.\n\n<div class=\"note\">\n\nFirst para in div.\n\n<div>\n\nNested.\n\n</div>\n\nLast para in div.\n\n</div>\n\nAfter the div.\n",
+    "inline_fence": "```inline``` code at line start.\n\nMiddle paragraph.\n\n```python\nx = 1\n\ny = 2\n```\n\nAfter the code.\n",
+}
+
+def test_streaming_matches_in_memory_on_edge_cases(tmp_path):
+    for name, body in EDGE_CASES.items():
+        (tmp_path / name).mkdir()
+        guide = body * 3
+        in_memory_html, streaming_html = _render_both(tmp_path / name, guide, max_chunk_chars=1)
+        assert _normalize(streaming_html) == _normalize(in_memory_html), name
+
+def test_sections_never_split_inside_quotes_or_html():
+    quote_chunks = list(iter_markdown_sections(EDGE_CASES["blockquote"].splitlines(keepends=True), max_chunk_chars=1))
+    assert not any(chunk.startswith("> quote two") for chunk in quote_chunks)
+
+    html_chunks = list(iter_markdown_sections(EDGE_CASES["raw_html"].splitlines(keepends=True), max_chunk_chars=1))
+    div_chunk = next(chunk for chunk in html_chunks if '<div class="note">' in chunk)
+    assert "Last para in div." in div_chunk
+    assert div_chunk.count("<div") == div_chunk.count("</div>")